@@ -0,0 +1,251 @@
+"""
+Offline benchmark for the batch scraping path.
+
+Starts a local stub of the bizfileonline search and detail endpoints in a
+separate process, points the scraper at it and drives
+scrape_batch_of_file_numbers until every file number is processed. Reports
+requests/sec, per-request latency percentiles and peak RSS of the scraping
+process, so throughput regressions can be caught without touching the network.
+Requests and their latencies are recorded by the stub itself, so every round
+trip is counted (retries included) and client-side backoff or governor sleeps
+never inflate the percentiles; time spent waiting on the governor is reported
+separately.
+
+Usage:
+    python benchmark_scraper.py --files 200 --latency-ms 40 --payload-bytes 20000
+    python benchmark_scraper.py --error-rate 0.05 --throttle-rate 0.01 --json bench.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from california_scraper import config, transport
+from california_scraper.cache import DetailCache
+from california_scraper.fetcher import BusinessDetailFetcher
+from california_scraper.observability import METRICS, configure_logging
+from california_scraper.output import JsonlResultWriter
+from california_scraper.scrape import scrape_batch_of_file_numbers
+
+SEARCH_PATH = '/api/Records/businesssearch'
+DETAIL_PREFIX = '/api/FilingDetail/business/'
+STATS_PATH = '/__stats'
+
+class StubServer(ThreadingHTTPServer):
+    """Stub API server carrying the benchmark options, a pre-built detail padding and the request log"""
+    daemon_threads = True
+
+    def __init__(self, address, options):
+        super().__init__(address, StubHandler)
+        self.options = options
+        self.padding = 'x' * options.payload_bytes
+        self.requests_lock = threading.Lock()
+        self.requests_log = []  # (status, seconds) for every API request served
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive so the scraper's connection pool is exercised like in production
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        if self.path != STATS_PATH:
+            # Logged before the body goes out, so the log is complete once the client has it
+            with self.server.requests_lock:
+                self.server.requests_log.append((status, time.perf_counter() - self.started))
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _simulate_upstream(self):
+        """Sleep for the configured latency and inject errors, returns True if a failure was sent"""
+        options = self.server.options
+        delay_ms = max(0.0, random.gauss(options.latency_ms, options.jitter_ms))
+        time.sleep(delay_ms / 1000)
+
+        roll = random.random()
+        if roll < options.throttle_rate:
+            self._send_json(429, {'error': 'Too Many Requests'}, {'Retry-After': '1'})
+            return True
+        if roll < options.throttle_rate + options.error_rate:
+            self._send_json(500, {'error': 'Internal Server Error'})
+            return True
+        return False
+
+    def do_POST(self):
+        self.started = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path != SEARCH_PATH:
+            self._send_json(404, {'error': 'Not Found'})
+            return
+        if self._simulate_upstream():
+            return
+
+        options = self.server.options
+        file_number = json.loads(body or b'{}').get('SEARCH_VALUE', '')
+
+        # Deterministic rows per file number; a small id space makes file numbers share businesses
+        rng = random.Random(file_number)
+        rows = {}
+        for _ in range(options.rows_per_search):
+            business_id = str(rng.randrange(options.id_space))
+            rows[business_id] = {
+                'TITLE': [f'STUB BUSINESS {business_id}'],
+                'STATUS': 'Active',
+                'RECORD_NUM': file_number
+            }
+
+        self._send_json(200, {'rows': rows})
+
+    def do_GET(self):
+        self.started = time.perf_counter()
+        if self.path == STATS_PATH:
+            with self.server.requests_lock:
+                self._send_json(200, self.server.requests_log)
+            return
+        if not self.path.startswith(DETAIL_PREFIX):
+            self._send_json(404, {'error': 'Not Found'})
+            return
+        if self._simulate_upstream():
+            return
+
+        business_id = self.path[len(DETAIL_PREFIX):].split('/')[0]
+        self._send_json(200, {
+            'TITLE': f'STUB BUSINESS {business_id}',
+            'DRAWER_DETAIL_LIST': [
+                {'LABEL': 'Entity Number', 'VALUE': business_id},
+                {'LABEL': 'Filler', 'VALUE': self.server.padding}
+            ]
+        })
+
+def serve_stub(options, port_queue):
+    """Run the stub server until the process is terminated"""
+    server = StubServer(('127.0.0.1', 0), options)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def fetch_stub_requests(stub_url):
+    """Return the (status, seconds) log of every request the stub served"""
+    with urllib.request.urlopen(stub_url + STATS_PATH) as response:
+        return [tuple(entry) for entry in json.load(response)]
+
+def run_benchmark(options, stub_url):
+    """Drive the batch scraper against the stub and return the report"""
+    config.BIZFILE_API_URL = stub_url + '/api'
+
+    file_numbers = [str(options.first_file_number + i) for i in range(options.files)]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = DetailCache(os.path.join(tmp_dir, 'cache.sqlite3')) if options.cache else None
+        writer = JsonlResultWriter(os.path.join(tmp_dir, 'scraped_data.jsonl'), raw_details=options.raw_details)
+        fetcher = BusinessDetailFetcher(cache, on_fetched=writer.write_business)
+        governor = transport.RequestGovernor(options.max_rps, options.max_throttle_retries)
+
+        started = time.perf_counter()
+        try:
+            remaining_files = file_numbers
+            while remaining_files:
+                batch_results, remaining_files = scrape_batch_of_file_numbers(
+                    remaining_files, {}, fetcher, writer, governor=governor
+                )
+                results.update(batch_results)
+        finally:
+            wall_seconds = time.perf_counter() - started
+            writer.close({'benchmark': True})
+            output_bytes = os.path.getsize(writer.path)
+            if cache is not None:
+                cache.close()
+
+    requests_log = fetch_stub_requests(stub_url)
+    latencies = sorted(seconds for _, seconds in requests_log)
+    spans = METRICS.summary()['spans']
+    governor_wait = spans.get('governor_wait', {})
+    return {
+        'files': len(file_numbers),
+        'files_succeeded': sum(1 for result in results.values() if result.get('success')),
+        'files_failed': sum(1 for result in results.values() if not result.get('success')),
+        'unique_businesses': fetcher.fetched_count,
+        'requests': len(requests_log),
+        'requests_by_status': {str(status): count for status, count in sorted(Counter(status for status, _ in requests_log).items())},
+        'wall_seconds': round(wall_seconds, 3),
+        'requests_per_sec': round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+        'files_per_sec': round(len(file_numbers) / wall_seconds, 2) if wall_seconds else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99': round(percentile(latencies, 0.99) * 1000, 2)
+        },
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'output_bytes': output_bytes,
+        'governor_wait_seconds': round(governor_wait.get('total_seconds', 0.0), 3),
+        'governor_waits': governor_wait.get('count', 0),
+        'spans': spans
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Offline benchmark of the batch scraper against a local stub API')
+    parser.add_argument('--files', type=int, default=100, help='number of file numbers to scrape')
+    parser.add_argument('--first-file-number', type=int, default=202250000000, help='first generated file number')
+    parser.add_argument('--rows-per-search', type=int, default=2, help='businesses returned per search')
+    parser.add_argument('--id-space', type=int, default=1000000, help='distinct business ids (small values create overlap)')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='mean stub response latency')
+    parser.add_argument('--jitter-ms', type=float, default=5.0, help='standard deviation of the latency')
+    parser.add_argument('--payload-bytes', type=int, default=4096, help='filler size of each detail payload')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of responses that are HTTP 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of responses that are HTTP 429')
+    parser.add_argument('--max-rps', type=float, default=0.0, help='request governor rate ceiling (0 = unlimited)')
+    parser.add_argument('--max-throttle-retries', type=int, default=6, help='governor retries of a throttled request')
+    parser.add_argument('--cache', action='store_true', help='use a fresh on-disk detail cache')
+    parser.add_argument('--raw-details', action='store_true', help='pass detail payloads through as raw bytes')
+    parser.add_argument('--json', dest='json_path', help='also write the report to this file')
+    parser.add_argument('--verbose', action='store_true', help='show the scraper output')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    options = parse_args(argv)
+    configure_logging('DEBUG' if options.verbose else 'WARNING')
+
+    port_queue = multiprocessing.Queue()
+    server_process = multiprocessing.Process(target=serve_stub, args=(options, port_queue), daemon=True)
+    server_process.start()
+    try:
+        port = port_queue.get(timeout=10)
+        report = run_benchmark(options, f'http://127.0.0.1:{port}')
+    finally:
+        server_process.terminate()
+        server_process.join()
+
+    print(json.dumps(report, indent=2))
+    if options.json_path:
+        with open(options.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
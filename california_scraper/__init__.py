@@ -0,0 +1,6 @@
+"""
+California business scraper.
+
+Modules are kept light to import: the browser stack (seleniumbase) is only loaded
+when cookies are needed and configuration is not validated until it is used.
+"""
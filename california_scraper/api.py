@@ -0,0 +1,117 @@
+"""Search and detail endpoints of the bizfileonline API"""
+import json
+from typing import Dict
+
+import requests
+
+from . import config
+from .observability import METRICS, record_response, timed
+from .errors import PermanentItemError, error_for_response
+
+def is_error_payload(payload: bytes) -> bool:
+    """Check for a JSON object with a top-level 'error'/'Error' key, parsing only bodies that mention one"""
+    if b'"error"' not in payload and b'"Error"' not in payload:
+        return False
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return False
+    return isinstance(data, dict) and ('error' in data or 'Error' in data)
+
+def is_json_payload(payload: bytes) -> bool:
+    """
+    Check that a details payload is JSON before it is cached or written. A body framed
+    as an object or array is accepted without parsing (urllib3 already rejects bodies
+    cut short of their Content-Length), anything else has to parse.
+    """
+    stripped = payload.strip()
+    if stripped[:1] + stripped[-1:] in (b'{}', b'[]'):
+        return True
+    try:
+        json.loads(payload)
+    except ValueError:
+        return False
+    return True
+
+@timed('search')
+def search_businesses_with_session(file_number: str, session: requests.Session):
+    """Search businesses using existing session"""
+    url = f"{config.BIZFILE_API_URL}/Records/businesssearch"
+    
+    # Add content-type header for POST request
+    headers = {"content-type": "application/json"}
+    
+    data = {
+        "SEARCH_VALUE": file_number,
+        "SEARCH_FILTER_TYPE_ID": "0",
+        "SEARCH_TYPE_ID": "1",
+        "FILING_TYPE_ID": "",
+        "STATUS_ID": "",
+        "FILING_DATE": {
+            "start": None,
+            "end": None
+        },
+        "CORPORATION_BANKRUPTCY_YN": False,
+        "CORPORATION_LEGAL_PROCEEDINGS_YN": False,
+        "OFFICER_OBJECT": {
+            "FIRST_NAME": "",
+            "MIDDLE_NAME": "",
+            "LAST_NAME": ""
+        },
+        "NUMBER_OF_FEMALE_DIRECTORS": "99",
+        "NUMBER_OF_UNDERREPRESENTED_DIRECTORS": "99",
+        "COMPENSATION_FROM": "",
+        "COMPENSATION_TO": "",
+        "SHARES_YN": False,
+        "OPTIONS_YN": False,
+        "BANKRUPTCY_YN": False,
+        "FRAUD_YN": False,
+        "LOANS_YN": False,
+        "AUDITOR_NAME": ""
+    }
+
+    response = session.post(url, headers=headers, json=data)
+    record_response(response, 'search')
+    
+    error = error_for_response(response, 'Search')
+    if error is not None:
+        METRICS.incr('failed_responses_total', endpoint='search', kind=error.kind)
+        raise error
+    
+    # The body is parsed once here, an error object in a 200 answer only concerns this search
+    try:
+        results = response.json()
+    except ValueError as e:
+        raise PermanentItemError(f"Search response is not valid JSON: {e}") from e
+    if isinstance(results, dict) and ('error' in results or 'Error' in results):
+        raise PermanentItemError(f"Search returned an error: {results.get('error', results.get('Error'))}")
+    return results
+
+@timed('detail')
+def get_business_details_with_session(business_id: str, session: requests.Session, conditional_headers: Dict[str, str] = None) -> requests.Response:
+    """
+    Get business details using existing session. The raw payload is left in
+    response.content (parsed only where needed); with conditional_headers the
+    server may answer 304 Not Modified instead of sending the body again.
+    """
+    url = f"{config.BIZFILE_API_URL}/FilingDetail/business/{business_id}/false"
+    
+    response = session.get(url, headers=conditional_headers)
+    record_response(response, 'detail')
+    
+    error = error_for_response(response, 'Details')
+    if error is not None:
+        METRICS.incr('failed_responses_total', endpoint='detail', kind=error.kind)
+        raise error
+    
+    # An error object or a non-JSON page (e.g. a bot challenge) in a 200 answer must
+    # not be cached or written as the business details
+    if response.status_code == 200:
+        if not is_json_payload(response.content):
+            METRICS.incr('failed_responses_total', endpoint='detail', kind=PermanentItemError.kind)
+            raise PermanentItemError(f"Details for business ID {business_id} are not valid JSON")
+        if is_error_payload(response.content):
+            METRICS.incr('failed_responses_total', endpoint='detail', kind=PermanentItemError.kind)
+            raise PermanentItemError(f"Details returned an error for business ID {business_id}")
+    
+    return response
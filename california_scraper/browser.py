@@ -0,0 +1,149 @@
+"""Captcha solving and cookie capture with a real browser (seleniumbase is imported on first use)"""
+import time
+
+import requests
+
+from . import config
+from .observability import logger, timed
+
+def solve_captcha(sitekey, pageurl):
+    try:
+        # Submit captcha
+        payload = {
+            'key': config.API_KEY,
+            'method': 'hcaptcha',
+            'sitekey': sitekey,
+            'pageurl': pageurl,
+            'json': '1'
+        }
+        
+        logger.info("Submitting captcha to API...")
+        response = requests.post(config.SOLVE_URL, data=payload)
+        response_data = response.json()
+        
+        if response_data.get('status') != 1:
+            raise Exception(f"Failed to submit captcha: {response_data}")
+            
+        request_id = response_data['request']
+        logger.info("Captcha submitted successfully. Request ID: %s", request_id)
+        
+        # Wait for solution
+        max_attempts = 24  # 2 minutes maximum wait time
+        attempts = 0
+        
+        while attempts < max_attempts:
+            time.sleep(5)
+            result_payload = {
+                'key': config.API_KEY,
+                'action': 'get',
+                'id': request_id,
+                'json': '1'
+            }
+            
+            result = requests.get(config.RESULT_URL, params=result_payload)
+            result_data = result.json()
+            
+            if result_data.get('status') == 1:
+                logger.info("Captcha solved successfully!")
+                return {
+                    'token': result_data['request'],
+                    'useragent': result_data.get('useragent'),
+                    'respKey': result_data.get('respKey')
+                }
+            
+            attempts += 1
+            logger.debug("Waiting for solution... Attempt %s/%s", attempts, max_attempts)
+            
+        raise Exception("Timeout waiting for captcha solution")
+        
+    except Exception as e:
+        logger.error("Error solving captcha: %s", e)
+        raise
+
+@timed('get_cookies')
+def get_cookies():
+    # Imported here so that paths which never open a browser don't pay for it
+    from seleniumbase import SB
+
+    with SB(uc=True, locale="en", headless=True, xvfb=True) as sb:
+        url = "https://bizfileonline.sos.ca.gov/search/business"
+        sb.activate_cdp_mode(url, tzone="America/Panama")
+        sb.sleep(3)
+        
+        # First try to find search input on main page (no captcha needed)
+        try:
+            logger.debug("Checking for search input on main page...")
+            sb.wait_for_element_present('input[placeholder="Search by name or file number"]', timeout=5)
+            logger.info("Search input found on main page - no captcha needed!")
+            logger.debug("Waiting 5 seconds for cookies to be set...")
+            sb.sleep(5)
+            
+            # Get all cookies directly
+            cookies = sb.cdp.get_all_cookies()
+            
+            # Convert cookies to the format expected by requests
+            cookie_dict = {}
+            for cookie in cookies:
+                cookie_dict[cookie.name] = cookie.value
+                
+            return cookie_dict
+            
+        except Exception as e:
+            # Search input not found, proceed with captcha solving
+            logger.debug("Search input not found on main page: %s", e)
+            logger.debug("Looking for captcha iframe...")
+            
+            try:
+                # Wait for and switch to the iframe (only exists if captcha is present)
+                logger.debug("Waiting for iframe to be present...")
+                sb.wait_for_element_present('iframe#main-iframe')
+                sb.switch_to_frame('iframe#main-iframe')
+                logger.debug("Switched to iframe")
+                
+                # Extract sitekey from within the iframe
+                sitekey = sb.get_attribute('div[class="h-captcha"]', 'data-sitekey')
+                logger.debug("Found sitekey: %s", sitekey)
+                
+                if sitekey:
+                    try:
+                        # Solve captcha
+                        captcha_data = solve_captcha(sitekey, url)
+                        
+                        # Set useragent if provided
+                        if captcha_data.get('useragent'):
+                            sb.execute_script(
+                                f'navigator.userAgent = "{captcha_data["useragent"]}";'
+                            )
+                        
+                        # Set both response fields
+                        js_script = f'''
+                            document.querySelector("[name=h-captcha-response]").innerHTML = "{captcha_data['token']}";
+                            document.querySelector("[name=g-recaptcha-response]").innerHTML = "{captcha_data['token']}";
+                            if (typeof onCaptchaFinished === 'function') {{
+                                onCaptchaFinished("{captcha_data['token']}");
+                            }}
+                        '''
+                        sb.execute_script(js_script)
+                        logger.info("Captcha response set successfully")
+                        
+                    except Exception as captcha_error:
+                        logger.warning("Failed to handle captcha: %s", captcha_error)
+                else:
+                    logger.warning("No captcha sitekey found in iframe")
+                    
+            except Exception as iframe_error:
+                logger.warning("No iframe found or iframe error: %s", iframe_error)
+                logger.info("Proceeding without captcha solving")
+        
+        # Wait a bit for all cookies to be set
+        sb.sleep(5)
+        
+        # Get all cookies
+        cookies = sb.cdp.get_all_cookies()
+        
+        # Convert cookies to the format expected by requests
+        cookie_dict = {}
+        for cookie in cookies:
+            cookie_dict[cookie.name] = cookie.value
+            
+        return cookie_dict
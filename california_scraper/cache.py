@@ -0,0 +1,165 @@
+"""Persistent business detail cache"""
+import hashlib
+import sqlite3
+import threading
+import time
+
+from . import config
+from .observability import logger
+
+def content_hash(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+class DetailCache:
+    """
+    Persistent SQLite cache of raw business detail payloads keyed by business_id.
+    Entries younger than ttl_hours are served without a request; older ones are
+    kept with their ETag/Last-Modified validators and content hash so they can be
+    revalidated with a conditional request. Once the cache holds more than
+    max_entries rows or max_bytes of payloads (0 = no byte limit), the least
+    recently used entries are evicted in one batch down to 90% of the limits.
+    """
+
+    def __init__(self, path: str, ttl_hours: float = 24, max_entries: int = 50000, max_bytes: int = 0):
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Shared by the batch worker threads, access is serialized by _lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS business_details ('
+                'business_id TEXT PRIMARY KEY, '
+                'details TEXT NOT NULL, '
+                'fetched_at REAL NOT NULL, '
+                'accessed_at REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_business_details_accessed '
+                'ON business_details (accessed_at)'
+            )
+            # Caches created before conditional requests lack the validator columns
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(business_details)')}
+            for column in ('etag', 'last_modified', 'content_hash'):
+                if column not in columns:
+                    self._conn.execute(f'ALTER TABLE business_details ADD COLUMN {column} TEXT')
+
+            # Size is tracked in memory from here on instead of counting rows on every put
+            self._entries, self._bytes = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(details AS BLOB))), 0) FROM business_details'
+            ).fetchone()
+
+    def lookup(self, business_id: str):
+        """
+        Return the cached entry for business_id as a dict with payload, etag,
+        last_modified, content_hash and fresh (within the TTL), or None
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT details, fetched_at, etag, last_modified, content_hash '
+                'FROM business_details WHERE business_id = ?',
+                (business_id,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            fresh = row[1] >= now - self.ttl_seconds
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._conn.execute(
+                'UPDATE business_details SET accessed_at = ? WHERE business_id = ?',
+                (now, business_id)
+            )
+
+        # Rows written before payloads were kept as bytes hold the JSON as text
+        payload = row[0].encode('utf-8') if isinstance(row[0], str) else row[0]
+        return {
+            'payload': payload,
+            'etag': row[2],
+            'last_modified': row[3],
+            'content_hash': row[4] or content_hash(payload),
+            'fresh': fresh
+        }
+
+    def put(self, business_id: str, payload: bytes, etag: str = None, last_modified: str = None, payload_hash: str = None):
+        """Store the payload for business_id and evict the least recently used overflow"""
+        now = time.time()
+        with self._lock, self._conn:
+            previous = self._conn.execute(
+                'SELECT LENGTH(CAST(details AS BLOB)) FROM business_details WHERE business_id = ?',
+                (business_id,)
+            ).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO business_details '
+                '(business_id, details, fetched_at, accessed_at, etag, last_modified, content_hash) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (business_id, payload, now, now, etag, last_modified, payload_hash or content_hash(payload))
+            )
+            if previous is None:
+                self._entries += 1
+            else:
+                self._bytes -= previous[0]
+            self._bytes += len(payload)
+
+            if self._entries > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries down to 90% of the limits, called with _lock held"""
+        target_entries = int(self.max_entries * 0.9)
+        target_bytes = int(self.max_bytes * 0.9)
+
+        victims = []
+        cursor = self._conn.execute(
+            'SELECT business_id, LENGTH(CAST(details AS BLOB)) FROM business_details ORDER BY accessed_at'
+        )
+        for business_id, size in cursor:
+            if self._entries <= target_entries and (not self.max_bytes or self._bytes <= target_bytes):
+                break
+            victims.append((business_id,))
+            self._entries -= 1
+            self._bytes -= size
+        cursor.close()
+
+        self._conn.executemany('DELETE FROM business_details WHERE business_id = ?', victims)
+        logger.debug("🗄️ Evicted %s cache entries", len(victims))
+
+    def touch(self, business_id: str):
+        """Mark a revalidated entry as freshly fetched"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE business_details SET fetched_at = ?, accessed_at = ? WHERE business_id = ?',
+                (now, now, business_id)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def open_detail_cache():
+    """Open the detail cache configured via environment, or None if disabled"""
+    if not config.DETAIL_CACHE_PATH:
+        return None
+
+    try:
+        cache = DetailCache(
+            config.DETAIL_CACHE_PATH,
+            config.DETAIL_CACHE_TTL_HOURS,
+            config.DETAIL_CACHE_MAX_ENTRIES,
+            int(config.DETAIL_CACHE_MAX_MB * 1024 * 1024)
+        )
+        logger.info("🗄️ Detail cache: %s (TTL %sh, max %s entries / %s MB)", config.DETAIL_CACHE_PATH, config.DETAIL_CACHE_TTL_HOURS, config.DETAIL_CACHE_MAX_ENTRIES, config.DETAIL_CACHE_MAX_MB)
+        return cache
+    except sqlite3.Error as e:
+        logger.warning("⚠️ Could not open detail cache %s: %s", config.DETAIL_CACHE_PATH, e)
+        return None
@@ -0,0 +1,205 @@
+"""Command line entry point of the scraper"""
+import itertools
+import os
+import sys
+import time
+
+from . import config
+from .browser import get_cookies
+from .cache import open_detail_cache
+from .fetcher import BusinessDetailFetcher
+from .inputs import FileNumberStream, detect_input_format, iter_raw_file_numbers, parse_file_numbers, write_file_numbers
+from .observability import METRICS, configure_logging, logger
+from .output import CheckpointJournal, JsonlResultWriter, trigger_new_workflow
+from .scrape import scrape_batch_of_file_numbers
+from .transport import create_request_governor
+
+def main():
+    """Main function with batch processing and blocking detection"""
+    configure_logging()
+    run_started = time.perf_counter()
+    request_id = os.getenv('REQUEST_ID', 'fallback-unknown')
+    cache = None
+    journal = None
+    try:
+        logger.info("🚀 Starting California business scraper (Request ID: %s)", request_id)
+        
+        if config.FILE_NUMBERS_FILE:
+            # Bulk input is streamed lazily, its size is only known once it has been read
+            raw_file_numbers = itertools.islice(iter_raw_file_numbers(config.FILE_NUMBERS_FILE), config.FILE_NUMBERS_OFFSET, None)
+            output_file = f'scraped_data_{request_id}.jsonl'
+            logger.info("📥 Streaming file numbers from %s", 'stdin' if config.FILE_NUMBERS_FILE == '-' else config.FILE_NUMBERS_FILE)
+            if config.FILE_NUMBERS_OFFSET:
+                logger.info("⏩ Starting at input offset %s", config.FILE_NUMBERS_OFFSET)
+        else:
+            # Get file numbers from environment variable
+            raw_file_numbers = parse_file_numbers(os.getenv('FILE_NUMBERS', '202250419109'))
+            logger.debug("File numbers to process: %s", raw_file_numbers)
+            logger.info("Total files: %s", len(raw_file_numbers))
+            
+            # Create filename
+            if len(raw_file_numbers) == 1:
+                output_file = f'scraped_data_{raw_file_numbers[0]}.jsonl'
+            else:
+                output_file = f'scraped_data_{request_id}_{len(raw_file_numbers)}_files.jsonl'
+        
+        # Skip file numbers a previous run of this request already completed
+        journal = CheckpointJournal(config.JOURNAL_PATH or f'scrape_journal_{request_id}.jsonl', resume=config.RESUME)
+        file_numbers = FileNumberStream(raw_file_numbers, skip=journal.completed, offset=config.FILE_NUMBERS_OFFSET)
+        pending_files = iter(file_numbers)
+        
+        # Read the first batch before starting the browser, there may be nothing to do
+        batch_offset = file_numbers.position
+        current_batch = list(itertools.islice(pending_files, 5))
+        if config.RESUME:
+            logger.info("⏩ Resuming from %s: %s files already completed so far", journal.path, file_numbers.skipped)
+        if not current_batch:
+            logger.info("🎉 No file numbers left to process")
+            return
+        
+        # Get initial cookies
+        config.require_api_key()
+        logger.info("🍪 Getting cookies and solving captcha...")
+        cookies = get_cookies()
+        logger.info("✅ Cookies obtained successfully")
+        
+        cache = open_detail_cache()
+        
+        # Results are streamed to the output file as each file number completes;
+        # unchanged businesses can only be recognised when the cache is on, their
+        # payloads go to a stored copy file that is shipped with the output
+        writer = JsonlResultWriter(
+            output_file,
+            append=config.RESUME,
+            raw_details=config.RAW_DETAILS,
+            incremental=config.INCREMENTAL,
+            stored_copy_path=f'stored_copies_{request_id}.jsonl' if cache is not None else None
+        )
+        logger.info("💾 Streaming scraped data to %s", output_file)
+        
+        fetcher = BusinessDetailFetcher(cache, on_fetched=writer.write_business)
+        governor = create_request_governor()
+        
+        # Process files in batches of 5, pulled from the input as they are needed
+        files_processed = 0
+        successful_files = 0
+        total_businesses = 0
+        current_batch_num = 1
+        
+        while current_batch:
+            logger.info("📦 Processing batch #%s of up to 5 files...", current_batch_num)
+            
+            # Process current batch
+            batch_results, remaining_files = scrape_batch_of_file_numbers(current_batch, cookies, fetcher, writer, journal, governor)
+            
+            # Only keep running totals, the results themselves are already written
+            files_processed += len(batch_results)
+            successful_files += sum(1 for result in batch_results.values() if result.get('success', False))
+            total_businesses += sum(result.get('businesses_found', 0) for result in batch_results.values())
+            
+            # If we have remaining files, it means we got blocked
+            if remaining_files:
+                input_handoff = None
+                if config.FILE_NUMBERS_FILE == '-':
+                    # stdin can't be read again, spill its unread rest to a file without holding it in memory
+                    files_remaining = write_file_numbers('remaining_files.txt', itertools.chain(remaining_files, pending_files))
+                    input_handoff = {'input_file': 'remaining_files.txt', 'input_format': 'lines', 'input_offset': 0, 'journal_path': journal.path}
+                elif config.FILE_NUMBERS_FILE:
+                    # Hand the input over by position: the next run re-reads this batch and its
+                    # journal skips the files of it that completed, the rest of the input is never loaded
+                    files_remaining = None
+                    input_handoff = {
+                        'input_file': config.FILE_NUMBERS_FILE,
+                        'input_format': detect_input_format(config.FILE_NUMBERS_FILE),
+                        'input_offset': batch_offset,
+                        'journal_path': journal.path
+                    }
+                else:
+                    # Hand the unprocessed part of the batch and the rest of the (already parsed) list over
+                    remaining_files = remaining_files + list(pending_files)
+                    files_remaining = len(remaining_files)
+                
+                logger.warning("🚫 BLOCKING DETECTED!")
+                logger.info("✅ Successfully processed: %s files", files_processed)
+                logger.info("⏳ Remaining files: %s", files_remaining if files_remaining is not None else f'rest of the input from offset {batch_offset}')
+                
+                writer.close({
+                    'total_files_requested': file_numbers.total_seen,
+                    'files_resumed': file_numbers.skipped,
+                    'files_processed': files_processed,
+                    'files_remaining': files_remaining,
+                    'duplicates_skipped': file_numbers.duplicates,
+                    'invalid_skipped': file_numbers.invalid,
+                    'unique_businesses': fetcher.fetched_count,
+                    'request_id': request_id,
+                    'blocked': True,
+                    'scrape_timestamp': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())
+                })
+                logger.info("💾 Partial results saved to: %s", output_file)
+                
+                # Trigger new workflow for remaining files
+                trigger_new_workflow(remaining_files, request_id, input_handoff)
+                
+                # Exit with partial success
+                logger.info("🏁 Partial processing complete!")
+                logger.info("📊 Files processed in this batch: %s", files_processed)
+                logger.info("🔄 New workflow will be triggered for the remaining files")
+                
+                return
+            
+            current_batch_num += 1
+            batch_offset = file_numbers.position
+            current_batch = list(itertools.islice(pending_files, 5))
+            
+            # Add small delay between batches if processing multiple batches
+            if current_batch:
+                time.sleep(2)
+        
+        # All files processed successfully
+        writer.close({
+            'total_files_requested': file_numbers.total_seen,
+            'files_resumed': file_numbers.skipped,
+            'files_processed': files_processed,
+            'files_remaining': 0,
+            'duplicates_skipped': file_numbers.duplicates,
+            'invalid_skipped': file_numbers.invalid,
+            'unique_businesses': fetcher.fetched_count,
+            'request_id': request_id,
+            'blocked': False,
+            'scrape_timestamp': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())
+        })
+        
+        if total_businesses > 0 or successful_files > 0:
+            logger.info("💾 Scraped data saved to %s", output_file)
+            
+            # Output JSON Lines data to console for GitHub Actions
+            if config.SCRAPED_DATA_STDOUT:
+                writer.echo_to_stdout()
+            
+            logger.info("🎉 SCRAPING COMPLETE!")
+            logger.info("📊 Total files processed: %s", files_processed)
+            logger.info("✅ Successful: %s", successful_files)
+            logger.info("❌ Failed: %s", files_processed - successful_files)
+            logger.info("🏢 Total businesses found: %s", total_businesses)
+            logger.info("📄 Output format: JSON Lines")
+        else:
+            logger.error("❌ No data was scraped from any file numbers")
+            sys.exit(1)
+        
+    except Exception as e:
+        logger.error("💥 Error in scraping process: %s", e)
+        sys.exit(1)
+    
+    finally:
+        if journal is not None:
+            journal.close()
+        if cache is not None:
+            logger.info("🗄️ Detail cache hits: %s, misses: %s", cache.hits, cache.misses)
+            cache.close()
+        
+        # Per-stage timings and counters for this run
+        METRICS.observe('run', time.perf_counter() - run_started)
+        try:
+            METRICS.export(f'metrics_{request_id}')
+        except OSError as e:
+            logger.warning("⚠️ Could not save metrics: %s", e)
@@ -0,0 +1,79 @@
+"""Run configuration read from environment variables, without side effects at import time"""
+import logging
+import os
+import sys
+
+logger = logging.getLogger('california_scraper')
+
+def env_number(name: str, default, kind):
+    """Read a numeric setting, falling back to the default with a warning when it is malformed"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return kind(value)
+    except ValueError:
+        logger.warning("⚠️ Ignoring invalid %s=%r, using %s", name, value, default)
+        return default
+
+def env_int(name: str, default: int) -> int:
+    return env_number(name, default, int)
+
+def env_float(name: str, default: float) -> float:
+    return env_number(name, float(default), float)
+
+# Get API key from environment variable (GitHub secrets), only checked once the browser is needed
+API_KEY = os.getenv('SOLVECAPTCHA_API_KEY')
+
+SOLVE_URL = "https://api.solvecaptcha.com/in.php"
+RESULT_URL = "https://api.solvecaptcha.com/res.php"
+
+# Base URL of the search and detail API (overridden by the offline benchmark)
+BIZFILE_API_URL = os.getenv('BIZFILE_API_URL', 'https://bizfileonline.sos.ca.gov/api')
+
+# Persistent business detail cache (set DETAIL_CACHE_PATH to '' to disable, DETAIL_CACHE_MAX_MB to 0 for no size limit)
+DETAIL_CACHE_PATH = os.getenv('DETAIL_CACHE_PATH', 'detail_cache.sqlite3')
+DETAIL_CACHE_TTL_HOURS = env_float('DETAIL_CACHE_TTL_HOURS', 24)
+DETAIL_CACHE_MAX_ENTRIES = env_int('DETAIL_CACHE_MAX_ENTRIES', 50000)
+DETAIL_CACHE_MAX_MB = env_float('DETAIL_CACHE_MAX_MB', 512)
+
+# Echo the JSON Lines output between the SCRAPED_DATA_JSON markers once the run completes
+SCRAPED_DATA_STDOUT = os.getenv('SCRAPED_DATA_STDOUT', 'true').lower() == 'true'
+
+# Checkpoint journal of completed file numbers (defaults to scrape_journal_<request_id>.jsonl)
+JOURNAL_PATH = os.getenv('JOURNAL_PATH', '')
+RESUME = os.getenv('RESUME', 'false').lower() == 'true'
+
+# Shared request governor: aggregate request rate ceiling (0 disables it) and 429 handling
+MAX_REQUESTS_PER_SECOND = env_float('MAX_REQUESTS_PER_SECOND', 5)
+MAX_THROTTLE_RETRIES = env_int('MAX_THROTTLE_RETRIES', 6)
+MAX_RETRY_AFTER_SECONDS = env_float('MAX_RETRY_AFTER_SECONDS', 120)
+# Total pause budget of a run, kept well below the workflow's 600s timeout so blocked work is handed over
+MAX_THROTTLE_PAUSE_SECONDS = env_float('MAX_THROTTLE_PAUSE_SECONDS', 300)
+
+# Retries of a file number after a transient failure (timeout, dropped connection, 5xx), with exponential backoff
+TRANSIENT_RETRIES = env_int('TRANSIENT_RETRIES', 2)
+TRANSIENT_RETRY_BACKOFF_SECONDS = env_float('TRANSIENT_RETRY_BACKOFF_SECONDS', 2)
+
+# Bulk input: newline, CSV or JSONL file of file numbers ('-' reads stdin), read lazily
+FILE_NUMBERS_FILE = os.getenv('FILE_NUMBERS_FILE', '')
+FILE_NUMBERS_FORMAT = os.getenv('FILE_NUMBERS_FORMAT', 'auto').lower()
+# Input values to skip before reading, set when resuming a bulk run that was handed over
+FILE_NUMBERS_OFFSET = env_int('FILE_NUMBERS_OFFSET', 0)
+
+# Write unchanged businesses as 'not_modified' markers pointing at a per-run stored copy file
+INCREMENTAL = os.getenv('INCREMENTAL', 'false').lower() == 'true'
+
+# Write detail payloads into the output as received, without parsing and re-serializing them
+RAW_DETAILS = os.getenv('RAW_DETAILS', 'false').lower() == 'true'
+
+# Logging verbosity (DEBUG shows per-item progress) and format ('text' or 'json')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+
+def require_api_key() -> str:
+    """Return the solvecaptcha API key, exiting when it is not set"""
+    if not API_KEY:
+        logger.error("❌ SOLVECAPTCHA_API_KEY environment variable not set")
+        sys.exit(1)
+    return API_KEY
@@ -0,0 +1,77 @@
+"""Error taxonomy deciding whether a failure is retried, skipped or ends the run"""
+import requests
+from urllib3.exceptions import NewConnectionError
+
+class ScrapeError(Exception):
+    """Base class of scraper errors, kind is the label used in results and metrics"""
+    kind = 'permanent'
+
+class TransientError(ScrapeError):
+    """Temporary failure (5xx, dropped connection), the item is retried"""
+    kind = 'transient'
+
+class ThrottledError(ScrapeError):
+    """Still throttled (429) after the request governor's retries, the rest of the run is handed over"""
+    kind = 'throttled'
+
+class PermanentItemError(ScrapeError):
+    """Failure specific to one item (other 4xx, unexpected response), the item is skipped"""
+    kind = 'permanent'
+
+class FatalError(ScrapeError):
+    """The session or host is rejected (401/403, refused connections), nothing else can succeed"""
+    kind = 'fatal'
+
+# Failures after which the remaining file numbers are handed over to a new run
+RUN_ENDING_KINDS = (ThrottledError.kind, FatalError.kind)
+
+# Exceptions raised by requests for conditions that may clear up on their own
+TRANSIENT_EXCEPTIONS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.RetryError
+)
+
+def error_for_response(response: requests.Response, endpoint: str):
+    """Return the typed error for a failed response, or None if it succeeded"""
+    status = response.status_code
+    if status < 400:
+        return None
+
+    message = f"{endpoint} request failed (status {status})"
+    if status in (401, 403):
+        return FatalError(message)
+    if status == 429:
+        return ThrottledError(message)
+    if status >= 500:
+        return TransientError(message)
+    return PermanentItemError(message)
+
+def error_kind(exception: BaseException) -> str:
+    """Classify an exception by its type into one of the taxonomy kinds"""
+    if isinstance(exception, ScrapeError):
+        return exception.kind
+    if isinstance(exception, TRANSIENT_EXCEPTIONS):
+        return TransientError.kind
+    # Anything else (bad payload, unexpected data) only affects this item
+    return PermanentItemError.kind
+
+def is_connection_refused(exception: BaseException) -> bool:
+    """Check whether a requests ConnectionError means the host refused to connect"""
+    if not isinstance(exception, requests.ConnectionError) or not exception.args:
+        return False
+    # requests wraps urllib3's MaxRetryError, whose reason is the last connection error
+    reason = getattr(exception.args[0], 'reason', exception.args[0])
+    if not isinstance(reason, NewConnectionError):
+        return False
+    cause = reason.__cause__ or reason.__context__
+    return isinstance(cause, ConnectionRefusedError)
+
+def exhausted_error_kind(exception: BaseException) -> str:
+    """Kind of a failure that is still there after the item's retries"""
+    # A host that keeps refusing connections is blocking us rather than being flaky;
+    # resets, dropped connections, timeouts and 5xx stay per-item failures
+    if is_connection_refused(exception):
+        return FatalError.kind
+    return error_kind(exception)
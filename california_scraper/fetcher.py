@@ -0,0 +1,111 @@
+"""Single-flight business detail fetching on top of the detail cache"""
+import concurrent.futures
+import threading
+from typing import Tuple
+
+import requests
+
+from .api import get_business_details_with_session, is_json_payload
+from .cache import DetailCache, content_hash
+from .observability import METRICS, logger
+
+def get_business_details_cached(business_id: str, session: requests.Session, cache: DetailCache = None) -> Tuple[bytes, str, bool]:
+    """
+    Get the raw business details payload from the cache, revalidating stale entries
+    with a conditional request and falling back to a full download on a miss.
+    Returns: (payload, content_hash, modified) where modified is False when the
+    payload is the same as the copy already stored in the cache
+    """
+    entry = cache.lookup(business_id) if cache is not None else None
+    if entry is not None and not is_json_payload(entry['payload']):
+        # Stored before bodies were checked, fetch it again instead of serving it
+        logger.warning("⚠️ Ignoring cached details of business ID %s that are not valid JSON", business_id)
+        entry = None
+
+    if entry is not None and entry['fresh']:
+        logger.debug("🗄️ Cache hit for business ID: %s", business_id)
+        METRICS.incr('cache_requests_total', result='hit')
+        return entry['payload'], entry['content_hash'], False
+
+    conditional_headers = {}
+    if entry is not None:
+        METRICS.incr('cache_requests_total', result='stale')
+        if entry['etag']:
+            conditional_headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            conditional_headers['If-Modified-Since'] = entry['last_modified']
+    elif cache is not None:
+        METRICS.incr('cache_requests_total', result='miss')
+
+    response = get_business_details_with_session(business_id, session, conditional_headers or None)
+
+    if response.status_code == 304 and entry is not None:
+        logger.debug("♻️ Business ID %s not modified since last fetch", business_id)
+        METRICS.incr('detail_revalidations_total', result='not_modified')
+        cache.touch(business_id)
+        return entry['payload'], entry['content_hash'], False
+
+    payload = response.content
+    payload_hash = content_hash(payload)
+    modified = entry is None or payload_hash != entry['content_hash']
+    if entry is not None:
+        METRICS.incr('detail_revalidations_total', result='modified' if modified else 'same_content')
+
+    if cache is not None:
+        cache.put(business_id, payload, response.headers.get('ETag'), response.headers.get('Last-Modified'), payload_hash)
+
+    return payload, payload_hash, modified
+
+class BusinessDetailFetcher:
+    """
+    Single-flight detail fetcher shared by the batch worker threads.
+    Each business_id is fetched at most once per run; concurrent callers for the
+    same id wait on the in-flight fetch. The payload is handed to on_fetched once
+    (e.g. the output writer) instead of being kept in memory for the whole run.
+    """
+
+    def __init__(self, cache: DetailCache = None, on_fetched=None):
+        self.cache = cache
+        self.on_fetched = on_fetched
+        self._lock = threading.Lock()
+        self._in_flight = {}  # business_id -> Future completed once details are stored
+        self._fetched = set()  # business_ids already handed to on_fetched
+
+    @property
+    def fetched_count(self) -> int:
+        with self._lock:
+            return len(self._fetched)
+
+    def fetch(self, business_id: str, file_number: str, session: requests.Session):
+        """Make sure details for business_id are fetched, unless another caller already has"""
+        with self._lock:
+            if business_id in self._fetched:
+                logger.debug("🔗 Details already stored for business ID: %s", business_id)
+                return
+
+            future = self._in_flight.get(business_id)
+            is_owner = future is None
+            if is_owner:
+                future = concurrent.futures.Future()
+                self._in_flight[business_id] = future
+
+        if not is_owner:
+            logger.debug("🔗 Waiting for in-flight details of business ID: %s", business_id)
+            future.result()
+            return
+
+        try:
+            payload, payload_hash, modified = get_business_details_cached(business_id, session, self.cache)
+            if self.on_fetched is not None:
+                self.on_fetched(business_id, file_number, payload, payload_hash, modified)
+        except Exception as e:
+            # Forget the failed call so a later caller can try again
+            with self._lock:
+                del self._in_flight[business_id]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._fetched.add(business_id)
+            del self._in_flight[business_id]
+        future.set_result(None)
@@ -0,0 +1,155 @@
+"""Parsing and lazy streaming of file number input"""
+import csv
+import io
+import json
+import os
+import re
+import sys
+
+from . import config
+from .observability import logger
+
+def parse_file_numbers(file_numbers_input):
+    """Parse file numbers from various input formats"""
+    if not file_numbers_input:
+        return ['202250419109']  # Default file number
+    
+    # Try to parse as JSON array first
+    try:
+        parsed = json.loads(file_numbers_input)
+        if isinstance(parsed, list):
+            return [str(num).strip() for num in parsed if str(num).strip()]
+    except:
+        pass
+    
+    # Parse as comma-separated values
+    file_numbers = [num.strip() for num in file_numbers_input.split(',') if num.strip()]
+    
+    if not file_numbers:
+        return ['202250419109']  # Default if parsing fails
+    
+    return file_numbers
+
+FILE_NUMBER_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9-]{0,31}$')
+
+def detect_input_format(path: str) -> str:
+    """Pick the input format from config.FILE_NUMBERS_FORMAT or the file extension"""
+    if config.FILE_NUMBERS_FORMAT in ('lines', 'csv', 'jsonl'):
+        return config.FILE_NUMBERS_FORMAT
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    return 'lines'
+
+def iter_raw_file_numbers(path: str, input_format: str = None):
+    """
+    Lazily yield raw file number values from a newline, CSV or JSONL file, or stdin for '-'.
+    CSV uses the 'file_number' column when a header names it, otherwise the first column;
+    a first row without digits in that column is taken for a header and skipped.
+    JSONL lines may be bare values or objects with a 'file_number' key.
+    """
+    input_format = input_format or detect_input_format(path)
+    # utf-8-sig drops the byte order mark Excel and other Windows tools put at the start
+    if path == '-':
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+    else:
+        stream = open(path, newline='', encoding='utf-8-sig')
+
+    try:
+        if input_format == 'csv':
+            column = 0
+            for row_num, row in enumerate(csv.reader(stream)):
+                if not row:
+                    continue
+                if row_num == 0:
+                    header = [cell.strip().lower() for cell in row]
+                    if 'file_number' in header:
+                        column = header.index('file_number')
+                        continue
+                    # Any other header: file numbers always contain digits, column names don't
+                    if not re.search(r'\d', row[0]):
+                        logger.debug("Skipping CSV header: %s", row)
+                        continue
+                if column < len(row):
+                    yield row[column]
+
+        elif input_format == 'jsonl':
+            for line_num, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    value = json.loads(line)
+                except ValueError:
+                    logger.warning("⚠️ Skipping malformed JSON on input line %s", line_num)
+                    continue
+                yield value.get('file_number', '') if isinstance(value, dict) else value
+
+        else:
+            for line in stream:
+                yield line
+
+    finally:
+        if path == '-':
+            # Leave the process's stdin open
+            stream.detach()
+        else:
+            stream.close()
+
+class FileNumberStream:
+    """
+    Validates and dedupes file numbers lazily as they stream in from any iterable.
+    Values in skip (e.g. completed in a previous run) are counted but not yielded.
+    position is the number of raw input values consumed so far, starting at offset
+    when the raw values begin part way into the input.
+    """
+
+    def __init__(self, raw_values, skip=(), offset: int = 0):
+        self.raw_values = raw_values
+        self.skip = skip
+        self.position = offset
+        self.accepted = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    @property
+    def total_seen(self) -> int:
+        """Distinct valid file numbers read so far, including skipped ones"""
+        return self.accepted + self.skipped
+
+    def __iter__(self):
+        seen = set()
+        for raw in self.raw_values:
+            self.position += 1
+            file_number = str(raw).strip()
+            if not file_number or file_number.startswith('#'):
+                continue
+
+            if not FILE_NUMBER_PATTERN.match(file_number):
+                self.invalid += 1
+                logger.warning("⚠️ Skipping invalid file number: %r", file_number)
+                continue
+
+            if file_number in seen:
+                self.duplicates += 1
+                continue
+            seen.add(file_number)
+
+            if file_number in self.skip:
+                self.skipped += 1
+                continue
+
+            self.accepted += 1
+            yield file_number
+
+def write_file_numbers(path: str, file_numbers) -> int:
+    """Stream file numbers to a newline separated file and return how many were written"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for file_number in file_numbers:
+            f.write(file_number + '\n')
+            count += 1
+    return count
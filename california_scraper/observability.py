@@ -0,0 +1,147 @@
+"""Structured logging, timing spans and run counters"""
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any
+
+from . import config
+
+logger = logging.getLogger('california_scraper')
+class JsonLogFormatter(logging.Formatter):
+    """Format log records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+def configure_logging(level: str = None, log_format: str = None):
+    """Send scraper logs to stdout with the configured level and format"""
+    handler = logging.StreamHandler(sys.stdout)
+    if (log_format or config.LOG_FORMAT) == 'json':
+        handler.setFormatter(JsonLogFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s [%(threadName)s] %(message)s'))
+
+    logger.handlers[:] = [handler]
+    logger.setLevel(level or config.LOG_LEVEL)
+    logger.propagate = False
+
+class RunMetrics:
+    """
+    Thread-safe counters and timed spans for one scraper run.
+    Counters are keyed by name plus optional labels; spans keep count, total
+    and max seconds. export() writes a JSON summary and Prometheus text format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, labels) -> value
+        self._spans = {}  # name -> [count, total_seconds, max_seconds]
+
+    def incr(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, span: str, seconds: float):
+        with self._lock:
+            stats = self._spans.setdefault(span, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed block, failures included"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            spans = {name: list(stats) for name, stats in self._spans.items()}
+
+        return {
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            'spans': {
+                name: {
+                    'count': count,
+                    'total_seconds': round(total, 6),
+                    'avg_seconds': round(total / count, 6) if count else 0.0,
+                    'max_seconds': round(maximum, 6)
+                }
+                for name, (count, total, maximum) in sorted(spans.items())
+            }
+        }
+
+    def to_prometheus(self, prefix: str = 'california_scraper') -> str:
+        """Render counters and spans in the Prometheus text exposition format"""
+        summary = self.summary()
+        lines = []
+        seen_types = set()
+
+        for counter in summary['counters']:
+            metric = f"{prefix}_{counter['name']}"
+            if metric not in seen_types:
+                lines.append(f"# TYPE {metric} counter")
+                seen_types.add(metric)
+            labels = ','.join(f'{key}="{value}"' for key, value in counter['labels'].items())
+            lines.append(f"{metric}{{{labels}}} {counter['value']}" if labels else f"{metric} {counter['value']}")
+
+        if summary['spans']:
+            lines.append(f"# TYPE {prefix}_span_seconds summary")
+            for name, stats in summary['spans'].items():
+                lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {stats["count"]}')
+                lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {stats["total_seconds"]}')
+            lines.append(f"# TYPE {prefix}_span_seconds_max gauge")
+            for name, stats in summary['spans'].items():
+                lines.append(f'{prefix}_span_seconds_max{{span="{name}"}} {stats["max_seconds"]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def export(self, basename: str):
+        """Write <basename>.json and <basename>.prom"""
+        with open(f'{basename}.json', 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        with open(f'{basename}.prom', 'w') as f:
+            f.write(self.to_prometheus())
+        logger.info("📈 Metrics saved to %s.json and %s.prom", basename, basename)
+
+# Metrics shared by every worker thread of the run
+METRICS = RunMetrics()
+
+def timed(span: str):
+    """Decorator recording the duration of every call under the given span name"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.span(span):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record_response(response, endpoint: str):
+    """Count the request, urllib3 retries behind it and the bytes received"""
+    METRICS.incr('requests_total', endpoint=endpoint, status=str(response.status_code))
+    METRICS.incr('bytes_received_total', len(response.content), endpoint=endpoint)
+
+    retries = getattr(response.raw, 'retries', None)
+    if retries is not None and retries.history:
+        METRICS.incr('retries_total', len(retries.history), endpoint=endpoint)
@@ -0,0 +1,250 @@
+"""JSON Lines result output, checkpoint journal and follow-up workflow hand-off"""
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from typing import Dict, List, Any
+
+from .cache import content_hash
+from .observability import logger
+
+def open_jsonl_for_append(path: str):
+    """Open a JSON Lines file for appending, dropping a torn last line left by a crash"""
+    f = open(path, 'ab')
+    end = f.tell()
+    if end == 0:
+        return f
+
+    # Find the end of the last complete line, reading backwards in chunks
+    keep = 0
+    with open(path, 'rb') as existing:
+        position = end
+        while position > 0:
+            step = min(65536, position)
+            position -= step
+            existing.seek(position)
+            newline = existing.read(step).rfind(b'\n')
+            if newline != -1:
+                keep = position + newline + 1
+                break
+
+    if keep != end:
+        logger.warning("⚠️ Dropping a torn last line (%s bytes) from %s", end - keep, path)
+        f.truncate(keep)
+    return f
+
+class JsonlResultWriter:
+    """
+    Streams scraped records to a JSON Lines file as they are produced.
+    Each line is a compact JSON object tagged with a 'type':
+      - 'business': details for one business_id, written once per run
+      - 'result':   the outcome for one file number (business IDs + search data)
+      - 'metadata': run summary trailer, written last by close()
+    With raw_details the detail payload bytes are spliced into the line as
+    received instead of being parsed and re-serialized. With incremental, a
+    business whose content did not change since it was stored in the detail
+    cache is written as a 'not_modified' marker. Its payload goes once per
+    content hash to the stored copy file, a JSON Lines file of
+    {'content_hash', 'details'} records shipped next to the output, so the
+    marker never depends on the cache row that may be evicted or overwritten.
+    """
+
+    def __init__(self, path: str, append: bool = False, raw_details: bool = False, incremental: bool = False, stored_copy_path: str = None):
+        self.path = path
+        self.raw_details = raw_details
+        self.incremental = incremental
+        self.stored_copy_path = stored_copy_path
+        self.results_written = 0
+        self.businesses_written = 0
+        self._lock = threading.Lock()
+        # When resuming, earlier records stay in place and new ones follow them
+        self._append = append
+        self._file = open_jsonl_for_append(path) if append else open(path, 'wb')
+        # Opened on the first marker so runs without one leave no empty file behind
+        self._stored_copy_file = None
+        self._stored_hashes = set()
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        return json.dumps(record, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def _write_line(self, line: bytes):
+        with self._lock:
+            self._file.write(line + b'\n')
+            self._file.flush()
+
+    def _write(self, record: Dict[str, Any]):
+        self._write_line(self._encode(record))
+
+    def _details_line(self, record: Dict[str, Any], payload: bytes) -> bytes:
+        """Encode record with the details payload added as its last key"""
+        stripped = payload.strip()
+        if self.raw_details and stripped[:1] in (b'{', b'['):
+            # Newlines can only be insignificant whitespace in valid JSON, so
+            # flattening them keeps the payload on a single JSON Lines record
+            raw = stripped.replace(b'\r', b' ').replace(b'\n', b' ')
+            return self._encode(record)[:-1] + b',"details":' + raw + b'}'
+        return self._encode({**record, 'details': json.loads(payload)})
+
+    def _store_copy(self, payload: bytes, payload_hash: str):
+        """Write payload to the stored copy file unless its content hash is already there"""
+        with self._lock:
+            if payload_hash in self._stored_hashes:
+                return
+        line = self._details_line({'content_hash': payload_hash}, payload)
+        with self._lock:
+            if payload_hash in self._stored_hashes:
+                return
+            if self._stored_copy_file is None:
+                path = self.stored_copy_path
+                self._stored_copy_file = open_jsonl_for_append(path) if self._append else open(path, 'wb')
+            self._stored_copy_file.write(line + b'\n')
+            self._stored_copy_file.flush()
+            self._stored_hashes.add(payload_hash)
+
+    def write_business(self, business_id: str, file_number: str, payload: bytes, payload_hash: str = None, modified: bool = True):
+        """Write the details payload of a business, tagged with the file number that first referenced it"""
+        record = {
+            'type': 'business',
+            'business_id': business_id,
+            'file_number': file_number,
+            'content_hash': payload_hash or content_hash(payload)
+        }
+
+        if self.incremental and not modified and self.stored_copy_path:
+            # The stored copy has to exist before a marker can point at it
+            self._store_copy(payload, record['content_hash'])
+            record['not_modified'] = True
+            record['stored_copy'] = {'file': os.path.basename(self.stored_copy_path), 'content_hash': record['content_hash']}
+            self._write(record)
+        else:
+            self._write_line(self._details_line(record, payload))
+
+        with self._lock:
+            self.businesses_written += 1
+
+    def write_result(self, file_number: str, result: Dict[str, Any]):
+        """Write the outcome for a single file number"""
+        self._write({'type': 'result', 'file_number': file_number, **result})
+        with self._lock:
+            self.results_written += 1
+
+    def sync(self):
+        """Force everything written so far to disk"""
+        with self._lock:
+            for f in (self._stored_copy_file, self._file):
+                if f is not None:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def close(self, metadata: Dict[str, Any]):
+        """Write the metadata trailer and close the file"""
+        self._write({'type': 'metadata', **metadata})
+        with self._lock:
+            if self._stored_copy_file is not None:
+                self._stored_copy_file.close()
+            self._file.close()
+
+    def echo_to_stdout(self):
+        """Copy the written file to stdout between the markers consumed by GitHub Actions"""
+        print("\n=== SCRAPED_DATA_JSON_START ===", flush=True)
+        with open(self.path, 'rb') as f:
+            shutil.copyfileobj(f, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+        print("=== SCRAPED_DATA_JSON_END ===")
+
+class CheckpointJournal:
+    """
+    Append-only journal of completed file numbers, one JSON line per record.
+    Every record is fsync'd before record() returns, so whatever the journal
+    lists survived even if the process is killed right after; the output it
+    vouches for has to be synced first (JsonlResultWriter.sync). On resume, file
+    numbers that completed successfully are skipped; failed ones run again.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self.completed = self._load_completed() if resume else set()
+        self._file = open_jsonl_for_append(path) if resume else open(path, 'wb')
+
+    def _load_completed(self) -> set:
+        """Read successfully completed file numbers from an existing journal"""
+        completed = set()
+        if not os.path.exists(self.path):
+            return completed
+
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from an interrupted write is not a completion
+                    continue
+                if record.get('success'):
+                    completed.add(record['file_number'])
+                else:
+                    completed.discard(record['file_number'])
+
+        return completed
+
+    def record(self, file_number: str, result: Dict[str, Any]):
+        """Durably record that file_number has been written to the output"""
+        line = json.dumps({
+            'file_number': file_number,
+            'success': result.get('success', False),
+            'completed_at': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())
+        }, separators=(',', ':')).encode('utf-8') + b'\n'
+
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if result.get('success', False):
+                self.completed.add(file_number)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def trigger_new_workflow(remaining_files: List[str], request_id: str, input_handoff: Dict[str, Any] = None):
+    """
+    Trigger a new workflow with remaining file numbers. Bulk input is handed over
+    as input_handoff (input file, offset, format and journal) instead of a list.
+    """
+    if not remaining_files and input_handoff is None:
+        return
+        
+    if input_handoff is not None:
+        logger.info("🔄 Triggering new workflow for %s from input offset %s...", input_handoff['input_file'], input_handoff['input_offset'])
+    else:
+        logger.info("🔄 Triggering new workflow for %s remaining files...", len(remaining_files))
+    
+    # Set environment variable for the next workflow
+    remaining_files_json = json.dumps(remaining_files)
+    
+    # Generate a new request ID for the retry workflow
+    import uuid
+    retry_request_id = str(uuid.uuid4())
+    
+    # Create a file with remaining file numbers (or where to continue the input) for GitHub Actions to pick up
+    handoff = dict(input_handoff) if input_handoff is not None else {'file_numbers': remaining_files}
+    handoff.update({
+        'request_id': retry_request_id,
+        'original_request_id': request_id,
+        'trigger_time': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())
+    })
+    with open('remaining_files.json', 'w') as f:
+        json.dump(handoff, f, indent=2)
+    
+    logger.info("📝 Remaining files saved to: remaining_files.json")
+    logger.info("🆔 New request ID: %s", retry_request_id)
+    if input_handoff is not None:
+        logger.info(
+            "⏩ Continue with FILE_NUMBERS_FILE=%s FILE_NUMBERS_FORMAT=%s FILE_NUMBERS_OFFSET=%s JOURNAL_PATH=%s RESUME=true",
+            input_handoff['input_file'], input_handoff['input_format'], input_handoff['input_offset'], input_handoff['journal_path']
+        )
+    else:
+        logger.debug("File numbers: %s", remaining_files)
@@ -0,0 +1,148 @@
+"""Batch scraping of file numbers"""
+import concurrent.futures
+import time
+from typing import Dict, List, Any, Tuple
+
+import requests
+
+from . import config, transport
+from .api import search_businesses_with_session
+from .errors import RUN_ENDING_KINDS, TransientError, error_kind, exhausted_error_kind
+from .fetcher import BusinessDetailFetcher
+from .observability import METRICS, logger, timed
+from .output import CheckpointJournal, JsonlResultWriter
+from .transport import RequestGovernor
+
+def collect_file_number(file_number: str, session: requests.Session, fetcher: BusinessDetailFetcher) -> List[Dict[str, Any]]:
+    """Search a file number and fetch the details of every business found"""
+    scraped_data = []
+
+    # Search for businesses
+    logger.debug("Searching for businesses...")
+    search_results = search_businesses_with_session(file_number, session)
+
+    # Extract business IDs from the results
+    if 'rows' in search_results:
+        # The rows is a dictionary where keys are the business IDs
+        for business_id, business_data in search_results['rows'].items():
+            logger.debug("📋 Fetching details for business ID: %s", business_id)
+
+            # Get detailed information for each business (stored once per run by the fetcher)
+            fetcher.fetch(business_id, file_number, session)
+
+            # Add the scraped data to our results
+            scraped_data.append({
+                'file_number': file_number,
+                'business_id': business_id,
+                'search_data': business_data
+            })
+
+            logger.debug("✅ Successfully scraped business ID: %s", business_id)
+    else:
+        logger.warning("⚠️ No results found or unexpected response format")
+
+    return scraped_data
+
+@timed('file_number')
+def scrape_single_file_number(file_number: str, session: requests.Session, fetcher: BusinessDetailFetcher) -> Tuple[str, Dict[str, Any]]:
+    """Scrape data for a single file number, retrying it after transient failures"""
+    logger.debug("🔍 Processing file number: %s", file_number)
+
+    attempt = 0
+    while True:
+        try:
+            scraped_data = collect_file_number(file_number, session, fetcher)
+
+            METRICS.incr('files_total', outcome='success')
+            return file_number, {
+                'success': True,
+                'businesses_found': len(scraped_data),
+                'data': scraped_data,
+                'error': None
+            }
+
+        except Exception as e:
+            if error_kind(e) == TransientError.kind and attempt < config.TRANSIENT_RETRIES:
+                attempt += 1
+                delay = config.TRANSIENT_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                logger.warning("⏳ Transient error on %s (%s), retry %s/%s in %.1fs", file_number, e, attempt, config.TRANSIENT_RETRIES, delay)
+                METRICS.incr('file_retries_total')
+                time.sleep(delay)
+                continue
+
+            error_type = exhausted_error_kind(e)
+            logger.error("❌ Error processing %s (%s): %s", file_number, error_type, e)
+            METRICS.incr('files_total', outcome=error_type)
+
+            return file_number, {
+                'success': False,
+                'businesses_found': 0,
+                'data': [],
+                'error': str(e),
+                'error_type': error_type
+            }
+
+@timed('batch')
+def scrape_batch_of_file_numbers(file_numbers: List[str], cookies: Dict[str, str], fetcher: BusinessDetailFetcher, writer: JsonlResultWriter, journal: CheckpointJournal = None, governor: RequestGovernor = None) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Scrape a batch of file numbers (up to 5) simultaneously
+    Each result is streamed to writer as soon as its future completes and then
+    checkpointed in the journal. Items that failed for good are recorded and
+    skipped; a throttled or fatal failure stops the batch and every file number
+    without a collected result is handed back as remaining.
+    Returns: (results, remaining_file_numbers)
+    """
+    logger.info("🚀 Starting batch processing of %s file numbers", len(file_numbers))
+    logger.debug("File numbers: %s", file_numbers)
+
+    # Create session with cookies
+    session = transport.create_session_with_cookies(cookies, governor)
+
+    results = {}
+    blocked = False
+
+    # Process up to 5 file numbers simultaneously
+    batch_size = min(5, len(file_numbers))
+    current_batch = file_numbers[:batch_size]
+    remaining_files = file_numbers[batch_size:]
+
+    try:
+        logger.debug("Processing batch of %s files simultaneously...", len(current_batch))
+
+        # Use ThreadPoolExecutor for concurrent processing
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+            # Submit all tasks
+            future_to_file = {
+                executor.submit(scrape_single_file_number, file_num, session, fetcher): file_num
+                for file_num in current_batch
+            }
+
+            # Collect results as they complete
+            for future in concurrent.futures.as_completed(future_to_file):
+                file_num, result = future.result()
+
+                if result.get('error_type') in RUN_ENDING_KINDS:
+                    logger.warning("🚫 Blocking detected for file %s (%s)", file_num, result['error_type'])
+                    blocked = True
+                    # Hand back this file and every other one whose result was not collected yet
+                    remaining_files = [f for f in current_batch if f not in results] + remaining_files
+                    for other_future in future_to_file:
+                        other_future.cancel()
+                    break
+
+                results[file_num] = result
+                writer.write_result(file_num, result)
+                if journal is not None:
+                    # The journal vouches for this output, so it has to reach the disk first
+                    writer.sync()
+                    journal.record(file_num, result)
+
+    finally:
+        session.close()
+
+    if blocked:
+        logger.warning("🚫 Blocking detected! Processed %s files, %s remaining", len(results), len(remaining_files))
+    else:
+        logger.info("✅ Batch completed successfully! Processed %s files", len(results))
+
+    return results, remaining_files
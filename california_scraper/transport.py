@@ -0,0 +1,204 @@
+"""HTTP sessions, the shared request governor and blocking detection"""
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import config
+from .observability import METRICS, logger
+
+class RequestGovernor:
+    """
+    Request governor shared by all worker threads of a run.
+    Spaces requests so the aggregate rate stays under max_requests_per_second and,
+    when the server answers 429, pauses every worker for the Retry-After period
+    (or an exponential backoff when the header is missing) before they continue.
+    The pauses of a run add up to at most max_total_pause seconds; once that budget
+    is spent, throttled requests are given up so the run can hand over its work
+    before the job is killed.
+    """
+
+    def __init__(self, max_requests_per_second: float = 5, max_throttle_retries: int = 6, max_retry_after: float = 120, max_total_pause: float = 300):
+        self.interval = 1.0 / max_requests_per_second if max_requests_per_second > 0 else 0.0
+        self.max_throttle_retries = max_throttle_retries
+        self.max_retry_after = max_retry_after
+        self.max_total_pause = max_total_pause
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._total_paused = 0.0
+        self._consecutive_throttles = 0
+
+    def acquire(self):
+        """Block until this caller may send its next request"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_slot, self._paused_until)
+                self._next_slot = start + self.interval
+
+            delay = start - now
+            if delay > 0:
+                METRICS.observe('governor_wait', delay)
+                time.sleep(delay)
+
+            # A pause may have started while we were waiting for our slot
+            with self._lock:
+                if time.monotonic() >= self._paused_until:
+                    return
+
+    def parse_retry_after(self, value: str):
+        """Retry-After as seconds from now, accepting both delta-seconds and HTTP-date forms"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def throttle(self, retry_after: str = None):
+        """
+        Pause all workers after a 429 and return the pause length in seconds, or
+        None when the run's pause budget is spent and the request should be given up
+        """
+        with self._lock:
+            self._consecutive_throttles += 1
+            delay = self.parse_retry_after(retry_after)
+            if delay is None:
+                delay = 2.0 ** self._consecutive_throttles
+            delay = min(delay, self.max_retry_after)
+
+            # Only the part of the pause beyond one already running counts against the budget
+            now = time.monotonic()
+            paused_until = max(self._paused_until, now + delay)
+            extension = paused_until - max(self._paused_until, now)
+            exhausted = self._total_paused + extension > self.max_total_pause
+            if not exhausted:
+                self._total_paused += extension
+                self._paused_until = paused_until
+
+        METRICS.incr('throttled_responses_total')
+        if exhausted:
+            logger.warning("⏸️ Throttled by server and the %.0fs pause budget is spent, giving up", self.max_total_pause)
+            return None
+        logger.warning("⏸️ Throttled by server, pausing requests for %.1fs", delay)
+        return delay
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_throttles = 0
+
+class GovernedHTTPAdapter(HTTPAdapter):
+    """HTTP adapter that sends every request through a shared RequestGovernor and retries 429s"""
+
+    def __init__(self, governor: RequestGovernor, **kwargs):
+        self.governor = governor
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        attempt = 0
+        while True:
+            self.governor.acquire()
+            response = super().send(request, **kwargs)
+
+            if response.status_code != 429:
+                self.governor.record_success()
+                return response
+
+            if attempt >= self.governor.max_throttle_retries:
+                # Still throttled after pausing, the caller raises ThrottledError
+                return response
+
+            attempt += 1
+            if self.governor.throttle(response.headers.get('Retry-After')) is None:
+                return response
+            response.close()
+
+class GovernedRetry(Retry):
+    """urllib3 Retry whose retries wait for the request governor like first attempts do"""
+
+    def __init__(self, *args, governor: RequestGovernor = None, **kwargs):
+        self.governor = governor
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.governor = self.governor
+        return retry
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self.governor is not None:
+            self.governor.acquire()
+
+def create_request_governor():
+    """Create the request governor configured via environment"""
+    return RequestGovernor(config.MAX_REQUESTS_PER_SECOND, config.MAX_THROTTLE_RETRIES, config.MAX_RETRY_AFTER_SECONDS, config.MAX_THROTTLE_PAUSE_SECONDS)
+
+def create_optimized_session(governor: RequestGovernor = None):
+    """Create an optimized requests session with connection pooling and retry logic"""
+    session = requests.Session()
+    
+    # Configure retry strategy
+    retry_options = dict(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=["HEAD", "GET", "POST"]
+    )
+    if governor is not None:
+        # Retries go through the governor too, and 429s (with or without Retry-After)
+        # are left to it instead of being slept on by each worker
+        retry_strategy = GovernedRetry(governor=governor, respect_retry_after_header=False, **retry_options)
+    else:
+        retry_strategy = Retry(**retry_options)
+    
+    # Configure HTTP adapter with connection pooling, governed when a governor is shared
+    adapter_options = dict(
+        max_retries=retry_strategy,
+        pool_connections=10,
+        pool_maxsize=20
+    )
+    if governor is not None:
+        adapter = GovernedHTTPAdapter(governor, **adapter_options)
+    else:
+        adapter = HTTPAdapter(**adapter_options)
+    
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    
+    # Set optimized timeouts
+    session.timeout = (5, 30)  # connection timeout, read timeout
+    
+    return session
+
+def create_session_with_cookies(cookies, governor: RequestGovernor = None):
+    """Create a new optimized requests session with the provided cookies"""
+    session = create_optimized_session(governor)
+    session.cookies.update(cookies)
+    
+    # Set default headers
+    session.headers.update({
+        "accept": "*/*",
+        "accept-language": "en-US,en;q=0.7",
+        "authorization": "undefined",
+        "priority": "u=1, i",
+        "referer": "https://bizfileonline.sos.ca.gov/search/business",
+        "sec-ch-ua": '"Brave";v="137", "Chromium";v="137", "Not/A)Brand";v="24"',
+        "sec-ch-ua-mobile": "?0",
+        "sec-ch-ua-platform": '"Windows"',
+        "sec-fetch-dest": "empty",
+        "sec-fetch-mode": "cors",
+        "sec-fetch-site": "same-origin",
+        "sec-gpc": "1",
+        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
+    })
+    
+    return session
@@ -0,0 +1,124 @@
+"""Detail payload validation before anything is cached or written"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from california_scraper import config
+from california_scraper.cache import DetailCache, content_hash
+from california_scraper.errors import PermanentItemError
+from california_scraper.fetcher import BusinessDetailFetcher, get_business_details_cached
+from california_scraper.output import JsonlResultWriter
+
+class DetailHandler(BaseHTTPRequestHandler):
+    """Answers every detail request with the server's body"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.hits += 1
+        body = self.server.body
+        self.send_response(200)
+        self.send_header('Content-Type', self.server.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class DetailValidationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), DetailHandler)
+        self.server.lock = threading.Lock()
+        self.server.hits = 0
+        self.server.body = b'{}'
+        self.server.content_type = 'application/json'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.api_url = config.BIZFILE_API_URL
+        config.BIZFILE_API_URL = f'http://127.0.0.1:{self.server.server_address[1]}/api'
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = DetailCache(os.path.join(self.tmp_dir, 'cache.sqlite3'))
+        self.session = requests.Session()
+
+    def tearDown(self):
+        self.session.close()
+        self.cache.close()
+        config.BIZFILE_API_URL = self.api_url
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_non_json_body_is_not_cached(self):
+        self.server.body = b'<html><body>Checking your browser...</body></html>'
+        self.server.content_type = 'text/html'
+
+        for _ in range(2):
+            with self.assertRaises(PermanentItemError):
+                get_business_details_cached('B1', self.session, self.cache)
+
+        self.assertIsNone(self.cache.lookup('B1'))
+        # Nothing was served from the cache, the second call asked the server again
+        self.assertEqual(self.server.hits, 2)
+
+    def test_non_json_cache_entry_is_fetched_again(self):
+        stale = b'<html>challenge</html>'
+        self.cache.put('B1', stale, payload_hash=content_hash(stale))
+        self.server.body = b'{"TITLE": "B1"}'
+
+        payload, _, _ = get_business_details_cached('B1', self.session, self.cache)
+
+        self.assertEqual(payload, b'{"TITLE": "B1"}')
+        self.assertEqual(self.server.hits, 1)
+        self.assertEqual(self.cache.lookup('B1')['payload'], payload)
+
+    def test_truncated_body_is_not_spliced_into_raw_output(self):
+        self.server.body = b'{"a": "trunc'
+        output_path = os.path.join(self.tmp_dir, 'scraped_data.jsonl')
+        writer = JsonlResultWriter(output_path, raw_details=True)
+        fetcher = BusinessDetailFetcher(self.cache, on_fetched=writer.write_business)
+
+        with self.assertRaises(PermanentItemError):
+            fetcher.fetch('B1', '202250419109', self.session)
+        self.server.body = b'{"TITLE": "B2"}'
+        fetcher.fetch('B2', '202250419109', self.session)
+        writer.close({})
+
+        with open(output_path, 'rb') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record.get('business_id') for record in records], ['B2', None])
+        self.assertIsNone(self.cache.lookup('B1'))
+
+    def test_not_modified_marker_resolves_without_the_cache(self):
+        payload = b'{"TITLE": "B1"}'
+        self.cache.put('B1', payload, payload_hash=content_hash(payload))
+        self.server.body = payload
+        output_path = os.path.join(self.tmp_dir, 'scraped_data.jsonl')
+        stored_copy_path = os.path.join(self.tmp_dir, 'stored_copies.jsonl')
+        writer = JsonlResultWriter(output_path, incremental=True, stored_copy_path=stored_copy_path)
+        fetcher = BusinessDetailFetcher(self.cache, on_fetched=writer.write_business)
+
+        fetcher.fetch('B1', '202250419109', self.session)
+        writer.close({})
+        # The cache row the marker was derived from does not survive
+        other = b'{"TITLE": "changed"}'
+        self.cache.put('B1', other, payload_hash=content_hash(other))
+
+        with open(output_path, 'rb') as f:
+            marker = json.loads(f.readline())
+        with open(stored_copy_path, 'rb') as f:
+            stored = {record['content_hash']: record['details'] for record in map(json.loads, f)}
+        self.assertTrue(marker['not_modified'])
+        self.assertEqual(marker['stored_copy'], {'file': 'stored_copies.jsonl', 'content_hash': content_hash(payload)})
+        self.assertEqual(stored[marker['stored_copy']['content_hash']], {'TITLE': 'B1'})
+
+if __name__ == '__main__':
+    unittest.main()
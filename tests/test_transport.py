@@ -0,0 +1,103 @@
+"""Request governor behaviour of governed sessions against a local HTTP server"""
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from california_scraper.transport import RequestGovernor, create_optimized_session
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """Answers with the next status of the server's script, 200 once it runs out"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.hits += 1
+            status = self.server.script.pop(0) if self.server.script else 200
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', self.server.retry_after)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+class RecordingGovernor(RequestGovernor):
+    """Governor that counts the calls made to it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquired = 0
+        self.throttled = 0
+
+    def acquire(self):
+        self.acquired += 1
+        super().acquire()
+
+    def throttle(self, retry_after: str = None):
+        self.throttled += 1
+        return super().throttle(retry_after)
+
+class GovernedSessionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ScriptedHandler)
+        self.server.lock = threading.Lock()
+        self.server.hits = 0
+        self.server.script = []
+        self.server.retry_after = '0'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, governor: RequestGovernor):
+        with create_optimized_session(governor) as session:
+            return session.get(self.url, timeout=5)
+
+    def test_429_with_retry_after_reaches_governor(self):
+        self.server.script = [429, 429]
+        governor = RecordingGovernor(0, max_throttle_retries=6)
+
+        response = self.get(governor)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(governor.throttled, 2)
+        self.assertEqual(self.server.hits, 3)
+
+    def test_persistent_429_is_not_retried_behind_the_governor(self):
+        self.server.script = [429] * 20
+        governor = RecordingGovernor(0, max_throttle_retries=2)
+
+        response = self.get(governor)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.server.hits, 3)
+        self.assertEqual(governor.acquired, self.server.hits)
+
+    def test_server_error_retries_wait_for_governor(self):
+        self.server.script = [503, 500]
+        governor = RecordingGovernor(0)
+
+        response = self.get(governor)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.hits, 3)
+        self.assertEqual(governor.acquired, self.server.hits)
+
+    def test_pause_budget_gives_up_throttled_requests(self):
+        self.server.script = [429] * 20
+        self.server.retry_after = '1'
+        governor = RecordingGovernor(0, max_throttle_retries=6, max_total_pause=1.5)
+
+        response = self.get(governor)
+
+        # The first 1s pause fits the budget, the second one does not
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.server.hits, 2)
+
+if __name__ == '__main__':
+    unittest.main()